@@ -18,6 +18,7 @@ import google.generativeai as genai
 import random
 from dotenv import load_dotenv
 import re
+from image_utils import image_key
 
 # Load variables from .env file automatically
 load_dotenv()
@@ -95,8 +96,16 @@ def get_unused_group_image(group_images):
     except Exception as e:
         print(f"⚠️ Could not load used images: {e}")
     
-    # Filter out recently used images
-    available = [img for img in group_images if img['url'] not in used_images]
+    # Track images by file name, not full URL: the library sync refreshes the
+    # CDN tokens in each URL, which would otherwise make used images look new.
+    # Older tracking files stored full URLs, so normalize those too, and drop
+    # entries for images no longer in the library so progress stays accurate.
+    library_keys = {image_key(img['url']) for img in group_images}
+    used_images = list(dict.fromkeys(
+        key for key in (image_key(url) for url in used_images) if key in library_keys
+    ))
+    used_set = set(used_images)
+    available = [img for img in group_images if image_key(img['url']) not in used_set]
     
     # If all images have been used, reset the list (start fresh cycle)
     if not available:
@@ -108,9 +117,9 @@ def get_unused_group_image(group_images):
     selected = random.choice(available)
     
     # Mark as used
-    used_images.append(selected['url'])
+    used_images.append(image_key(selected['url']))
     
-    # Save updated used list (keep ALL URLs until full cycle complete - no premature resetting!)
+    # Save updated used list (keep ALL images until full cycle complete - no premature resetting!)
     try:
         with open(USED_IMAGES_FILE, 'w') as f:
             json.dump({
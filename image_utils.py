@@ -0,0 +1,12 @@
+"""
+Group Image Library Helpers
+Shared by facebook_automation.py and sync_group_images.py - keep this module
+free of side effects (no env reads, no network) so importing it is always safe
+"""
+
+import os
+from urllib.parse import urlparse
+
+def image_key(url):
+    """Stable identity for a CDN image: the file name survives URL token refreshes"""
+    return os.path.basename(urlparse(url).path)
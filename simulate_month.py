@@ -0,0 +1,407 @@
+"""
+Offline Run Simulator for Capacity Planning
+Runs the real main() decision logic from facebook_automation.py against
+stubbed Gemini, Unsplash, RSS and Graph API providers on a virtual clock
+
+- No network calls, no real posts - thousands of scheduled slots in seconds
+- Configurable skip rate, latencies and failure rates per provider
+- Reports call counts, peak usage vs quota, image rotation cycles and tail latency
+
+Usage:
+    python simulate_month.py --days 30 --hours 0,5,10,15,20 --pages 1
+    python simulate_month.py --skip-rate 0.7 --failure-rate gemini=0.05 --latency graph=2.5
+"""
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+from types import SimpleNamespace
+from datetime import datetime, timezone
+from collections import Counter, defaultdict
+from unittest import mock
+
+import requests
+import feedparser
+
+# facebook_automation.py lives next to this script
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+# Median latency (seconds) and failure probability for each stubbed provider
+DEFAULT_LATENCY = {'gemini': 1.5, 'unsplash': 0.4, 'graph': 0.8, 'rss': 0.3}
+DEFAULT_FAILURE_RATE = {'gemini': 0.01, 'unsplash': 0.01, 'graph': 0.005, 'rss': 0.02}
+
+# Free-tier quotas to compare peak usage against: {provider: {window: max calls}}
+DEFAULT_QUOTAS = {
+    'gemini': {'minute': 10, 'day': 250},
+    'unsplash': {'hour': 50},
+    'graph': {'hour': 200},
+}
+
+WINDOW_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Same schedule as .github/workflows/facebook_automation.yml
+DEFAULT_HOURS = '0,5,10,15,20'
+
+class VirtualClock:
+    """Simulated time; every provider call advances it by a sampled latency"""
+
+    def __init__(self, start):
+        self.now = start
+
+class ProviderStubs:
+    """Stand-ins for every external service main() touches, with call accounting"""
+
+    def __init__(self, clock, rng, skip_rate, latency, failure_rate):
+        self.clock = clock
+        self.rng = rng
+        self.skip_rate = skip_rate
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = defaultdict(list)      # provider -> [virtual call start time]
+        self.latencies = defaultdict(list)  # provider -> [seconds]
+        self.failures = Counter()
+
+    def _call(self, provider):
+        """Record a call, advance the clock and decide whether it fails"""
+        self.calls[provider].append(self.clock.now)
+        # Lognormal around the configured median gives a realistic long tail
+        elapsed = self.latency[provider] * self.rng.lognormvariate(0, 0.5)
+        self.latencies[provider].append(elapsed)
+        self.clock.now += elapsed
+        if self.rng.random() < self.failure_rate[provider]:
+            self.failures[provider] += 1
+            return False
+        return True
+
+    # --- Gemini ---------------------------------------------------------
+
+    def generative_model(self, *args, **kwargs):
+        return SimpleNamespace(generate_content=self.generate_content)
+
+    def generate_content(self, prompt):
+        if not self._call('gemini'):
+            raise Exception("Simulated Gemini failure")
+        if 'Translate this Spanish news' in prompt and self.rng.random() < self.skip_rate:
+            return SimpleNamespace(text='SKIP')
+        if prompt.startswith('Generate a specific, descriptive Unsplash'):
+            return SimpleNamespace(text='Quito colonial architecture sunset')
+        return SimpleNamespace(text='Simulated post text 🏔️ What do you think?')
+
+    # --- RSS ------------------------------------------------------------
+
+    def parse_feed(self, feed_url):
+        if not self._call('rss'):
+            return feedparser.FeedParserDict(entries=[], bozo=1)
+        entries = [
+            feedparser.FeedParserDict(
+                title=f"Noticia {i}",
+                summary="Resumen simulado",
+                link=f"{feed_url}#article-{i}",
+                published='',
+            )
+            for i in range(2)
+        ]
+        return feedparser.FeedParserDict(entries=entries)
+
+    # --- HTTP (Unsplash + Graph API) -----------------------------------
+
+    def _response(self, provider, payload):
+        if not self._call(provider):
+            raise requests.exceptions.ConnectionError(f"Simulated {provider} failure")
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: payload)
+
+    def http_get(self, url, params=None, **kwargs):
+        n = len(self.calls['unsplash'])
+        return self._response('unsplash', {
+            'urls': {'regular': f"https://images.unsplash.com/sim-{n}"},
+            'user': {'name': 'Sim Photographer'},
+            'links': {'download_location': f"https://api.unsplash.com/sim-{n}/download"},
+        })
+
+    def http_post(self, url, data=None, **kwargs):
+        return self._response('graph', {'id': f"sim_{len(self.calls['graph'])}"})
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def peak_in_window(timestamps, window_seconds):
+    """Return (max calls in any sliding window, start time of the busiest window)
+
+    Quotas are enforced over rolling windows, so a burst straddling a clock
+    minute/hour boundary must count as one window, not two.
+    """
+    ordered = sorted(timestamps)
+    peak, peak_start = 0, None
+    left = 0
+    for right, t in enumerate(ordered):
+        while t - ordered[left] >= window_seconds:
+            left += 1
+        if right - left + 1 > peak:
+            peak, peak_start = right - left + 1, ordered[left]
+    return peak, peak_start
+
+def parse_hours(hours):
+    """Parse '0,5,10' (or a list of ints) into sorted, unique UTC hours"""
+    if isinstance(hours, str):
+        hours = hours.split(',')
+    try:
+        parsed = sorted({int(h) for h in hours})
+    except ValueError:
+        raise ValueError(f"hours must be comma-separated integers, got {hours!r}")
+    if not parsed or not all(0 <= h <= 23 for h in parsed):
+        raise ValueError(f"hours must be between 0 and 23, got {parsed}")
+    return parsed
+
+def write_library(path, library_size):
+    """Write the group image library the simulated run will rotate through"""
+    if library_size is None:
+        shutil.copy(os.path.join(REPO_DIR, 'group_images.json'), path)
+        return
+    images = [
+        {'url': f"https://sim.fbcdn.net/{i}_n.jpg", 'post_message': f"Image {i}", 'reactions': 0, 'comments': 0}
+        for i in range(library_size)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'total_images': library_size, 'images': images}, f)
+
+def simulate(days=30, hours=DEFAULT_HOURS, pages=1, skip_rate=0.5, latency=None,
+             failure_rate=None, library_size=None, seed=42, start=None):
+    """Run every scheduled slot through main() and return the collected metrics"""
+    latency = {**DEFAULT_LATENCY, **(latency or {})}
+    failure_rate = {**DEFAULT_FAILURE_RATE, **(failure_rate or {})}
+    hours = parse_hours(hours)
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    # Importing the module prints env debug output - keep the report clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        import facebook_automation as fa
+
+    # main() draws from the global RNG; seed it for the run and hand the
+    # caller's state back afterwards
+    rng_state = random.getstate()
+    random.seed(seed)
+    clock = VirtualClock(start)
+    stubs = ProviderStubs(clock, random.Random(seed + 1), skip_rate, latency, failure_rate)
+
+    slot_latencies = []
+    selected = Counter()
+    outcomes = Counter()
+    rotation = {'cycles': [], 'current': 0, 'cycle_started': start}
+
+    real_get_unused_group_image = fa.get_unused_group_image
+    real_choose_content_type = fa.choose_content_type
+
+    def tracked_get_unused_group_image(group_images):
+        image = real_get_unused_group_image(group_images)
+        with open(fa.USED_IMAGES_FILE, 'r') as f:
+            used = len(json.load(f)['group_images'])
+        if used == 1 and rotation['current'] > 0:
+            rotation['cycles'].append({
+                'posts': rotation['current'],
+                'days': (clock.now - rotation['cycle_started']) / 86400,
+            })
+            rotation['current'] = 0
+            rotation['cycle_started'] = clock.now
+        rotation['current'] += 1
+        return image
+
+    def tracked_choose_content_type():
+        content_type = real_choose_content_type()
+        selected[content_type] += 1
+        return content_type
+
+    fake_requests = SimpleNamespace(get=stubs.http_get, post=stubs.http_post, exceptions=requests.exceptions)
+
+    workdir = tempfile.mkdtemp(prefix='fb_sim_')
+    original_cwd = os.getcwd()
+    wall_start = time.perf_counter()
+    try:
+        os.chdir(workdir)
+        write_library('group_images.json', library_size)
+        patches = [
+            mock.patch.object(fa, 'FACEBOOK_PAGE_ID', 'sim_page'),
+            mock.patch.object(fa, 'FACEBOOK_ACCESS_TOKEN', 'sim_token'),
+            mock.patch.object(fa, 'GEMINI_API_KEY', 'sim_key'),
+            mock.patch.object(fa, 'UNSPLASH_API_KEY', 'sim_key'),
+            mock.patch.object(fa.genai, 'GenerativeModel', stubs.generative_model),
+            mock.patch.object(fa.feedparser, 'parse', stubs.parse_feed),
+            mock.patch.object(fa, 'requests', fake_requests),
+            mock.patch.object(fa, 'get_unused_group_image', tracked_get_unused_group_image),
+            mock.patch.object(fa, 'choose_content_type', tracked_choose_content_type),
+        ]
+        with contextlib.ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            for day in range(days):
+                for hour in hours:
+                    clock.now = max(clock.now, start + day * 86400 + hour * 3600)
+                    # Pages run back to back within the slot, sharing API keys
+                    for _ in range(pages):
+                        slot_start = clock.now
+                        output = io.StringIO()
+                        with contextlib.redirect_stdout(output):
+                            fa.main()
+                        slot_latencies.append(clock.now - slot_start)
+                        outcomes['posted' if '✅ Automation complete!' in output.getvalue() else 'failed'] += 1
+    finally:
+        random.setstate(rng_state)
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    providers = {}
+    for provider in DEFAULT_LATENCY:
+        calls = stubs.calls[provider]
+        peak_hour, peak_hour_start = peak_in_window(calls, 3600)
+        quotas = {}
+        for window, limit in DEFAULT_QUOTAS.get(provider, {}).items():
+            peak, _ = peak_in_window(calls, WINDOW_SECONDS[window])
+            quotas[window] = {'peak': peak, 'quota': limit, 'utilization': peak / limit}
+        providers[provider] = {
+            'calls': len(calls),
+            'calls_per_day': len(calls) / days if days else 0,
+            'failures': stubs.failures[provider],
+            'peak_hour_calls': peak_hour,
+            'peak_hour_start': datetime.fromtimestamp(peak_hour_start, timezone.utc).isoformat() if calls else None,
+            'quotas': quotas,
+            'latency_p50': percentile(stubs.latencies[provider], 50),
+            'latency_p95': percentile(stubs.latencies[provider], 95),
+            'latency_p99': percentile(stubs.latencies[provider], 99),
+        }
+
+    cycle_posts = [c['posts'] for c in rotation['cycles']]
+    cycle_days = [c['days'] for c in rotation['cycles']]
+    return {
+        'config': {
+            'days': days, 'hours': hours, 'pages': pages, 'skip_rate': skip_rate,
+            'latency': latency, 'failure_rate': failure_rate, 'seed': seed,
+            'content_weights': dict(fa.CONTENT_TYPES),
+        },
+        'slots': sum(outcomes.values()),
+        'outcomes': dict(outcomes),
+        'content_types_selected': dict(selected),
+        'providers': providers,
+        'slot_latency': {
+            'p50': percentile(slot_latencies, 50),
+            'p95': percentile(slot_latencies, 95),
+            'p99': percentile(slot_latencies, 99),
+            'max': max(slot_latencies, default=0.0),
+        },
+        'rotation': {
+            'completed_cycles': len(rotation['cycles']),
+            'cycle_length_posts': cycle_posts,
+            'avg_cycle_days': sum(cycle_days) / len(cycle_days) if cycle_days else None,
+            'images_used_in_current_cycle': rotation['current'],
+        },
+        'wall_seconds': time.perf_counter() - wall_start,
+    }
+
+def print_report(result):
+    """Human-readable summary of a simulation run"""
+    config = result['config']
+    print(f"🧪 Simulated {config['days']} days × {len(config['hours'])} slots/day × {config['pages']} page(s) "
+          f"= {result['slots']} runs in {result['wall_seconds']:.1f}s")
+    print(f"   Skip rate: {config['skip_rate']:.0%}, content weights: {config['content_weights']}")
+    print(f"   Outcomes: {result['outcomes']}, selected: {result['content_types_selected']}")
+    print()
+
+    print("📊 Provider usage:")
+    for provider, stats in result['providers'].items():
+        print(f"   {provider:<9} {stats['calls']:>6} calls ({stats['calls_per_day']:.1f}/day, "
+              f"{stats['failures']} failed), peak hour {stats['peak_hour_calls']}")
+        for window, quota in stats['quotas'].items():
+            flag = '⚠️' if quota['utilization'] > 0.8 else '✅'
+            print(f"      {flag} peak per {window}: {quota['peak']}/{quota['quota']} ({quota['utilization']:.0%} of quota)")
+        print(f"      latency p50 {stats['latency_p50']:.2f}s, p95 {stats['latency_p95']:.2f}s, "
+              f"p99 {stats['latency_p99']:.2f}s")
+    print()
+
+    slot = result['slot_latency']
+    print(f"⏱️ Run duration: p50 {slot['p50']:.1f}s, p95 {slot['p95']:.1f}s, p99 {slot['p99']:.1f}s, max {slot['max']:.1f}s")
+
+    rotation = result['rotation']
+    print(f"♻️ Image rotation: {rotation['completed_cycles']} full cycles", end='')
+    if rotation['avg_cycle_days'] is not None:
+        lengths = rotation['cycle_length_posts']
+        span = f"{min(lengths)}" if min(lengths) == max(lengths) else f"{min(lengths)}-{max(lengths)}"
+        print(f", {span} posts/cycle, ~{rotation['avg_cycle_days']:.1f} days each on average", end='')
+    print(f" ({rotation['images_used_in_current_cycle']} used in current cycle)")
+
+def parse_overrides(pairs, label, max_value=None):
+    """Parse repeated PROVIDER=VALUE flags into a dict of non-negative floats"""
+    overrides = {}
+    for pair in pairs or []:
+        provider, _, value = pair.partition('=')
+        if provider not in DEFAULT_LATENCY or not value:
+            raise argparse.ArgumentTypeError(
+                f"{label} must be PROVIDER=VALUE with PROVIDER in {', '.join(DEFAULT_LATENCY)}")
+        try:
+            number = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{label} value for {provider} must be a number, got {value!r}")
+        if number < 0 or (max_value is not None and number > max_value):
+            limit = f"between 0 and {max_value}" if max_value is not None else "0 or more"
+            raise argparse.ArgumentTypeError(f"{label} value for {provider} must be {limit}, got {number}")
+        overrides[provider] = number
+    return overrides
+
+def parse_args(argv=None):
+    """Parse and validate the command line; invalid input exits via parser.error"""
+    parser = argparse.ArgumentParser(description="Simulate scheduled runs offline for API budget planning")
+    parser.add_argument('--days', type=int, default=30, help="Days to simulate (default 30)")
+    parser.add_argument('--hours', default=DEFAULT_HOURS, help=f"UTC hours of each daily run (default {DEFAULT_HOURS})")
+    parser.add_argument('--pages', type=int, default=1, help="Pages posted per slot, sharing API keys (default 1)")
+    parser.add_argument('--skip-rate', type=float, default=0.5, help="Chance Gemini answers SKIP for a news article")
+    parser.add_argument('--latency', action='append', metavar='PROVIDER=SECONDS', help="Median latency override")
+    parser.add_argument('--failure-rate', action='append', metavar='PROVIDER=P', help="Failure probability override")
+    parser.add_argument('--library-size', type=int, help="Synthetic group image library size (default: group_images.json)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', metavar='FILE', help="Also write the full results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        args.latency = parse_overrides(args.latency, '--latency')
+        args.failure_rate = parse_overrides(args.failure_rate, '--failure-rate', max_value=1)
+        args.hours = parse_hours(args.hours)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    if not 0 <= args.skip_rate <= 1:
+        parser.error(f"--skip-rate must be between 0 and 1, got {args.skip_rate}")
+    if args.days < 1:
+        parser.error(f"--days must be at least 1, got {args.days}")
+    if args.pages < 1:
+        parser.error(f"--pages must be at least 1, got {args.pages}")
+    if args.library_size is not None and args.library_size < 0:
+        parser.error(f"--library-size must be 0 or more, got {args.library_size}")
+    return args
+
+def main():
+    args = parse_args()
+
+    result = simulate(
+        days=args.days, hours=args.hours, pages=args.pages, skip_rate=args.skip_rate,
+        latency=args.latency, failure_rate=args.failure_rate, library_size=args.library_size, seed=args.seed,
+    )
+    print_report(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Full results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Group Image Library Sync
+Incrementally refreshes group_images.json from the source group's feed
+via the Facebook Graph API
+
+- Reads only posts updated since the last sync (cursor pagination)
+- Refreshes image URLs that are about to expire, in bounded-concurrency batches
+- Merges new/changed images into the library in place
+"""
+
+import os
+import json
+import time
+import threading
+import requests
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from image_utils import image_key
+
+# Load variables from .env file automatically
+load_dotenv()
+
+# Configuration from environment variables
+FACEBOOK_ACCESS_TOKEN = os.environ.get('FACEBOOK_ACCESS_TOKEN')
+# Override to point the sync at a local Graph API stand-in
+GRAPH_API_BASE = os.environ.get('GRAPH_API_BASE', 'https://graph.facebook.com/v24.0').rstrip('/')
+
+GROUP_IMAGES_FILE = 'group_images.json'
+
+# Field expansion: one request returns the post, its photos and engagement counts
+POST_FIELDS = (
+    'id,message,updated_time,'
+    'attachments{type,media,target,subattachments{type,media,target}},'
+    'reactions.summary(true).limit(0),'
+    'comments.summary(true).limit(0)'
+)
+
+PHOTO_ATTACHMENT_TYPES = ('photo', 'album')
+
+PAGE_SIZE = 100            # Posts per feed page
+IDS_PER_REQUEST = 50       # Graph API limit for ?ids= lookups
+MAX_WORKERS = int(os.environ.get('SYNC_MAX_WORKERS', '4'))  # Concurrent refresh requests
+REFRESH_WINDOW_HOURS = 72  # Refresh URLs expiring within this window
+
+# requests.Session isn't thread-safe, so each refresh worker gets its own
+_local = threading.local()
+
+def get_session():
+    """Return this thread's HTTP session, creating it on first use"""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def graph_get(path_or_url, params=None):
+    """GET a Graph API path (or a full paging URL) and return the JSON body"""
+    if path_or_url.startswith('http'):
+        url = path_or_url
+    else:
+        url = f"{GRAPH_API_BASE}/{path_or_url.lstrip('/')}"
+    params = dict(params or {})
+    if 'access_token=' not in url:
+        params['access_token'] = FACEBOOK_ACCESS_TOKEN
+    response = get_session().get(url, params=params, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def is_missing_object_error(error):
+    """True if the Graph API says the requested object doesn't exist (or is no longer visible)
+
+    Code 100 alone is the generic "invalid parameter" error (bad field, etc.);
+    only subcode 33 means the object itself is missing.
+    """
+    response = getattr(error, 'response', None)
+    if response is None or response.status_code not in (400, 404):
+        return False
+    try:
+        details = response.json().get('error', {})
+    except ValueError:
+        return False
+    return details.get('code') == 100 and details.get('error_subcode') == 33
+
+def url_expires_at(url):
+    """Return the expiry (epoch seconds) encoded in an fbcdn URL's `oe` param, or None"""
+    oe = parse_qs(urlparse(url).query).get('oe')
+    if not oe:
+        return None
+    try:
+        return int(oe[0], 16)
+    except ValueError:
+        return None
+
+def parse_graph_time(value):
+    """Parse Graph API timestamps like 2026-02-03T18:00:23+0000"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+
+def extract_images(post):
+    """Turn one Graph API post into library image entries
+
+    Only group photos are kept - link previews, video posters and the like
+    also carry an image, but they aren't photos we want to repost.
+    """
+    reactions = post.get('reactions', {}).get('summary', {}).get('total_count', 0)
+    comments = post.get('comments', {}).get('summary', {}).get('total_count', 0)
+
+    media = []
+    for attachment in post.get('attachments', {}).get('data', []):
+        if attachment.get('type') not in PHOTO_ATTACHMENT_TYPES:
+            continue
+        subattachments = attachment.get('subattachments', {}).get('data', [])
+        for item in subattachments or [attachment]:
+            if item.get('type') != 'photo':
+                continue
+            src = item.get('media', {}).get('image', {}).get('src')
+            if src:
+                media.append((src, item.get('target', {}).get('id')))
+
+    images = []
+    for src, photo_id in media:
+        image = {
+            'url': src,
+            'post_message': post.get('message', ''),
+            'reactions': reactions,
+            'comments': comments,
+            'post_id': post['id'],
+            'updated_time': post.get('updated_time'),
+        }
+        if photo_id:
+            image['photo_id'] = photo_id
+        images.append(image)
+    return images
+
+def load_library():
+    """Load the library file, or start an empty one"""
+    if os.path.exists(GROUP_IMAGES_FILE):
+        with open(GROUP_IMAGES_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'images': [], 'total_images': 0}
+
+def save_library(library):
+    """Write the library back atomically so a crash never leaves half a file"""
+    library['total_images'] = len(library['images'])
+    tmp_file = GROUP_IMAGES_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(library, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, GROUP_IMAGES_FILE)
+
+def merge_images(library, fetched):
+    """Merge fetched images into the library in place; returns (added, updated)"""
+    index = {image_key(img['url']): img for img in library['images']}
+    added = []
+    updated = 0
+
+    for image in fetched:
+        existing = index.get(image_key(image['url']))
+        if existing is None:
+            index[image_key(image['url'])] = image
+            added.append(image)
+        elif existing != {**existing, **image}:
+            existing.update(image)
+            updated += 1
+
+    # Newest posts go to the front of the library
+    library['images'][:0] = added
+    return len(added), updated
+
+def fetch_feed_delta(group_id, state):
+    """Page through the group feed, returning (posts, complete)
+
+    Only posts updated since the last sync are read. The `after` cursor is kept
+    in `state` so an interrupted run resumes where it stopped. If the API
+    rejects a saved cursor (e.g. it went stale), the read restarts from the
+    last sync time instead of failing on every run.
+    """
+    params = {'fields': POST_FIELDS, 'limit': PAGE_SIZE}
+    if state.get('last_synced_at'):
+        params['since'] = state['last_synced_at']
+    if state.get('cursor'):
+        params['after'] = state['cursor']
+        print("   ↪️ Resuming from saved cursor")
+
+    posts = []
+    try:
+        try:
+            page = graph_get(f"{group_id}/feed", params)
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if 'after' not in params or status is None or not 400 <= status < 500:
+                raise
+            print("   ⚠️ Saved cursor was rejected, restarting from the last sync time")
+            del params['after']
+            state['cursor'] = None
+            page = graph_get(f"{group_id}/feed", params)
+        while True:
+            posts.extend(page.get('data', []))
+            paging = page.get('paging', {})
+            state['cursor'] = paging.get('cursors', {}).get('after')
+            print(f"   📄 Fetched {len(posts)} updated posts so far...")
+            if not page.get('data') or not paging.get('next'):
+                break
+            page = graph_get(paging['next'])
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error fetching group feed: {e}")
+        return posts, False
+    return posts, True
+
+def fetch_batch(batch):
+    """Fetch one ?ids= batch, returning (posts, missing_ids, failed_ids)
+
+    A single deleted post makes the Graph API reject the whole request, so on
+    a "does not exist" error the batch is retried one ID at a time to find it.
+    """
+    try:
+        return list(graph_get('', {'ids': ','.join(batch), 'fields': POST_FIELDS}).values()), [], []
+    except requests.exceptions.RequestException as e:
+        if not is_missing_object_error(e):
+            print(f"⚠️ Could not refresh batch of {len(batch)} posts: {e}")
+            return [], [], list(batch)
+        if len(batch) == 1:
+            return [], list(batch), []
+
+    posts, missing, failed = [], [], []
+    for post_id in batch:
+        found, gone, errored = fetch_batch([post_id])
+        posts.extend(found)
+        missing.extend(gone)
+        failed.extend(errored)
+    return posts, missing, failed
+
+def fetch_posts_by_id(post_ids):
+    """Fetch posts by ID in batches of IDS_PER_REQUEST with bounded concurrency
+
+    Returns (posts, missing_ids, failed_ids).
+    """
+    batches = [post_ids[i:i + IDS_PER_REQUEST] for i in range(0, len(post_ids), IDS_PER_REQUEST)]
+
+    posts, missing, failed = [], [], []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for found, gone, errored in executor.map(fetch_batch, batches):
+            posts.extend(found)
+            missing.extend(gone)
+            failed.extend(errored)
+    return posts, missing, failed
+
+def find_expiring_posts(library, now=None):
+    """Return post IDs whose image URLs expire within REFRESH_WINDOW_HOURS"""
+    cutoff = (now or time.time()) + REFRESH_WINDOW_HOURS * 3600
+    post_ids = []
+    legacy = 0
+    for img in library['images']:
+        expires_at = url_expires_at(img['url'])
+        if expires_at is None or expires_at > cutoff:
+            continue
+        if img.get('post_id'):
+            post_ids.append(img['post_id'])
+        else:
+            legacy += 1
+    if legacy:
+        print(f"   ⚠️ {legacy} expiring images have no post_id (manual entries) and can't be refreshed")
+    return list(dict.fromkeys(post_ids))
+
+def sync_group_images():
+    """Main sync workflow"""
+
+    print(f"🔄 Starting group image sync - {datetime.now()}")
+
+    if not FACEBOOK_ACCESS_TOKEN:
+        print("❌ Missing FACEBOOK_ACCESS_TOKEN!")
+        return False
+
+    library = load_library()
+    group_id = library.get('source_group') or os.environ.get('FACEBOOK_GROUP_ID')
+    if not group_id:
+        print("❌ No source_group in library and FACEBOOK_GROUP_ID not set!")
+        return False
+
+    state = library.setdefault('sync_state', {})
+    print(f"📚 Library has {len(library['images'])} images, last synced: {state.get('last_synced_at') or 'never'}")
+
+    # Step 1: new or changed posts since the last sync
+    print("📰 Fetching feed delta...")
+    posts, complete = fetch_feed_delta(group_id, state)
+    newest = max([state.get('pending_synced_at') or 0] + [
+        parse_graph_time(p['updated_time']).timestamp() for p in posts if p.get('updated_time')
+    ])
+    if not complete:
+        # Keep the cursor so the next run resumes. The newest posts are on the
+        # pages we already read, so remember their timestamp too - the resumed
+        # run only sees the older pages after the cursor.
+        if newest:
+            state['pending_synced_at'] = int(newest)
+        print(f"💾 Keeping {len(posts)} posts and resume cursor, still refreshing expiring URLs")
+
+    # Step 2: posts whose image URLs are about to expire (even if the feed
+    # read failed - otherwise the library's URLs would quietly go dead)
+    seen = {post['id'] for post in posts}
+    expiring = [post_id for post_id in find_expiring_posts(library) if post_id not in seen]
+    missing, failed = [], []
+    if expiring:
+        print(f"⏳ Refreshing {len(expiring)} posts with expiring image URLs...")
+        refreshed, missing, failed = fetch_posts_by_id(expiring)
+        posts.extend(refreshed)
+
+    # Posts that were deleted (or hidden) can't be refreshed - their CDN URLs
+    # will stop working, so take their images out of rotation
+    if missing:
+        gone = set(missing)
+        before = len(library['images'])
+        library['images'] = [img for img in library['images'] if img.get('post_id') not in gone]
+        print(f"🗑️ Removed {before - len(library['images'])} images from {len(gone)} deleted posts")
+
+    # Step 3: merge into the library
+    fetched = [image for post in posts for image in extract_images(post)]
+    added, updated = merge_images(library, fetched)
+
+    # Advance the watermark to the newest feed post we saw (including pages read
+    # by an interrupted run), and clear the resume cursor
+    if complete:
+        if newest > (state.get('last_synced_at') or 0):
+            state['last_synced_at'] = int(newest)
+        state['cursor'] = None
+        state.pop('pending_synced_at', None)
+
+    library['scraped_at'] = datetime.now().isoformat()
+    library['source_method'] = 'graph_api'
+    save_library(library)
+
+    if not complete:
+        print(f"\n⚠️ Sync incomplete: feed read was interrupted and will resume next run "
+              f"({added} images added, {updated} updated, {len(library['images'])} total)")
+        return False
+
+    if failed:
+        print(f"\n⚠️ Sync partially complete: {len(failed)} posts could not be refreshed and will be retried "
+              f"next run ({added} images added, {updated} updated, {len(library['images'])} total)")
+        return False
+
+    print(f"\n✅ Sync complete! {len(posts)} posts read, {added} images added, {updated} updated "
+          f"({len(library['images'])} total)")
+    return True
+
+if __name__ == "__main__":
+    sync_group_images()
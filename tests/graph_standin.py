@@ -0,0 +1,130 @@
+"""
+Local Graph API stand-in for testing sync_group_images.py
+Serves /{group}/feed with since/after cursor pagination and /?ids= lookups
+from an in-memory set of posts, over real HTTP on 127.0.0.1
+"""
+
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+
+def make_post(n, updated, expires, reactions=0, comments=0):
+    """Build a Graph API post with one photo attachment"""
+    return {
+        'id': f"group_{n}",
+        'message': f"Post {n}",
+        'updated': updated,  # epoch seconds; rendered as updated_time
+        'attachments': {'data': [{
+            'type': 'photo',
+            'media': {'image': {'src': f"https://scontent.fbcdn.net/v/{n}_n.jpg?oh=tok&oe={expires:x}"}},
+            'target': {'id': f"photo_{n}"},
+        }]},
+        'reactions': {'summary': {'total_count': reactions}},
+        'comments': {'summary': {'total_count': comments}},
+    }
+
+
+class GraphStandIn:
+    """In-memory Graph API with request logging and failure injection"""
+
+    def __init__(self, posts=None):
+        self.posts = {post['id']: post for post in (posts or [])}
+        self.requests = []       # (path, query dict) for every request served
+        self.fail_requests = set()  # 1-based request numbers that return HTTP 500
+        self.field_error = False    # reject ?ids= lookups as if POST_FIELDS were invalid
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v24.0"
+
+    def start(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body = standin.handle(self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def render(self, post):
+        rendered = {k: v for k, v in post.items() if k != 'updated'}
+        rendered['updated_time'] = datetime.fromtimestamp(post['updated'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+0000')
+        return rendered
+
+    def handle(self, raw_path):
+        url = urlparse(raw_path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self._lock:
+            self.requests.append((url.path, query))
+            number = len(self.requests)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            if number in self.fail_requests:
+                return 500, {'error': {'message': 'Simulated outage', 'code': 2}}
+            if url.path.endswith('/feed'):
+                return self.feed(url.path, query)
+            return self.lookup(query)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def feed(self, path, query):
+        since = int(query.get('since', 0))
+        limit = int(query['limit'])
+        after = query.get('after', '0')
+        if not after.isdigit():
+            return 400, {'error': {'message': 'Invalid cursor', 'type': 'OAuthException', 'code': 100}}
+        offset = int(after)
+        matching = sorted((p for p in self.posts.values() if p['updated'] >= since),
+                          key=lambda p: p['updated'], reverse=True)
+        page = matching[offset:offset + limit]
+        body = {
+            'data': [self.render(p) for p in page],
+            'paging': {'cursors': {'after': str(offset + len(page))}},
+        }
+        if offset + limit < len(matching):
+            next_query = {**query, 'after': str(offset + limit)}
+            body['paging']['next'] = f"{self.base_url.rsplit('/v24.0', 1)[0]}{path}?{urlencode(next_query)}"
+        return 200, body
+
+    def lookup(self, query):
+        ids = query['ids'].split(',')
+        if self.field_error:
+            return 400, {'error': {
+                'message': "(#100) Tried accessing nonexisting field (bogus) on node type (Post)",
+                'type': 'OAuthException',
+                'code': 100,
+            }}
+        missing = [post_id for post_id in ids if post_id not in self.posts]
+        if missing:
+            # Like the real Graph API, one bad ID fails the whole request
+            return 400, {'error': {
+                'message': f"Object with ID '{missing[0]}' does not exist",
+                'type': 'GraphMethodException',
+                'code': 100,
+                'error_subcode': 33,
+            }}
+        return 200, {post_id: self.render(self.posts[post_id]) for post_id in ids}
@@ -0,0 +1,62 @@
+"""Tests for the group image rotation in facebook_automation.py"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the module prints env debug output
+with contextlib.redirect_stdout(io.StringIO()):
+    import facebook_automation as fa
+
+
+def library(token):
+    return [{'url': f"https://scontent.fbcdn.net/v/{n}_n.jpg?oh={token}&oe=1"} for n in range(3)]
+
+
+class GroupImageRotationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        original_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        self.addCleanup(os.chdir, original_cwd)
+
+    def pick(self, group_images):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fa.get_unused_group_image(group_images)
+
+    def used(self):
+        with open(fa.USED_IMAGES_FILE) as f:
+            return json.load(f)
+
+    def test_refreshed_urls_stay_used_for_the_rest_of_the_cycle(self):
+        first = self.pick(library('old'))
+        second = self.pick(library('new'))
+        third = self.pick(library('new'))
+
+        picked = [os.path.basename(img['url'].split('?')[0]) for img in (first, second, third)]
+        self.assertEqual(sorted(picked), ['0_n.jpg', '1_n.jpg', '2_n.jpg'])
+        self.assertEqual(self.used()['cycle_progress'], '3/3')
+
+    def test_legacy_url_entries_are_normalized_and_stale_ones_dropped(self):
+        with open(fa.USED_IMAGES_FILE, 'w') as f:
+            json.dump(['https://scontent.fbcdn.net/v/0_n.jpg?oh=old&oe=1',
+                       'https://scontent.fbcdn.net/v/deleted_n.jpg?oh=old&oe=1'], f)
+
+        selected = self.pick(library('new'))
+
+        self.assertNotIn('/0_n.jpg', selected['url'])
+        self.assertEqual(self.used()['cycle_progress'], '2/3')
+        self.assertIn('0_n.jpg', self.used()['group_images'])
+
+
+if __name__ == '__main__':
+    unittest.main()
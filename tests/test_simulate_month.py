@@ -0,0 +1,118 @@
+"""Tests for the simulate_month.py metrics and rotation tracking"""
+
+import io
+import os
+import sys
+import random
+import argparse
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulate_month as sim
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        self.assertEqual(sim.percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(sim.percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(sim.percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(sim.percentile(list(range(1, 101)), 99), 99)
+        self.assertEqual(sim.percentile([5, 1, 3], 100), 5)
+        self.assertEqual(sim.percentile([5, 1, 3], 0), 1)
+
+    def test_empty(self):
+        self.assertEqual(sim.percentile([], 99), 0.0)
+
+
+class PeakInWindowTest(unittest.TestCase):
+
+    def test_burst_straddling_a_boundary_counts_as_one_window(self):
+        # 3 calls just before the minute boundary and 3 just after
+        calls = [55, 57, 59, 61, 63, 65]
+
+        self.assertEqual(sim.peak_in_window(calls, 60), (6, 55))
+
+    def test_window_excludes_calls_exactly_one_window_later(self):
+        self.assertEqual(sim.peak_in_window([0, 60, 120], 60), (1, 0))
+
+    def test_reports_start_of_busiest_window(self):
+        calls = [0, 500, 3700, 3710, 3720, 9000]
+
+        self.assertEqual(sim.peak_in_window(calls, 3600), (4, 500))
+
+    def test_empty(self):
+        self.assertEqual(sim.peak_in_window([], 60), (0, None))
+
+
+class ArgumentParsingTest(unittest.TestCase):
+
+    def test_hours_are_sorted_and_deduplicated(self):
+        self.assertEqual(sim.parse_hours('20,5,0,5'), [0, 5, 20])
+
+    def test_out_of_range_or_bad_hours_are_rejected(self):
+        for hours in ('25', '-1', '5,x', ''):
+            with self.assertRaises(ValueError):
+                sim.parse_hours(hours)
+
+    def test_overrides(self):
+        self.assertEqual(sim.parse_overrides(['gemini=0.2'], '--failure-rate', max_value=1), {'gemini': 0.2})
+        for pair in ('gemini=abc', 'gemini=1.5', 'gemini=-0.1', 'openai=0.1', 'gemini'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                sim.parse_overrides([pair], '--failure-rate', max_value=1)
+
+
+    def test_cli_rejects_out_of_range_values(self):
+        for argv in (['--days', '0'], ['--days', '-1'], ['--pages', '0'], ['--library-size', '-1'],
+                     ['--latency', 'gemini=abc'], ['--hours', '25'], ['--skip-rate', '1.5'],
+                     ['--failure-rate', 'graph=2']):
+            with self.subTest(argv=argv), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    sim.parse_args(argv)
+
+    def test_cli_accepts_valid_values(self):
+        args = sim.parse_args(['--days', '1', '--pages', '2', '--library-size', '0', '--hours', '5,0,5',
+                               '--failure-rate', 'graph=0.5'])
+
+        self.assertEqual(args.hours, [0, 5])
+        self.assertEqual(args.failure_rate, {'graph': 0.5})
+
+
+class RotationTest(unittest.TestCase):
+
+    def test_cycles_match_library_size(self):
+        result = sim.simulate(days=10, library_size=4, failure_rate={p: 0 for p in sim.DEFAULT_FAILURE_RATE})
+
+        rotation = result['rotation']
+        image_posts = result['content_types_selected'].get('quito', 0) + result['content_types_selected'].get('meme', 0)
+        self.assertGreater(rotation['completed_cycles'], 3)
+        self.assertEqual(set(rotation['cycle_length_posts']), {4})
+        # News that is skipped falls back to Quito content, which also uses an image
+        self.assertGreaterEqual(
+            rotation['completed_cycles'] * 4 + rotation['images_used_in_current_cycle'], image_posts)
+        self.assertEqual(result['outcomes'], {'posted': 50})
+
+    def test_callers_random_state_and_sys_path_are_left_alone(self):
+        random.seed(123)
+        expected = random.random()
+        random.seed(123)
+        path_before = list(sys.path)
+
+        sim.simulate(days=1)
+
+        self.assertEqual(random.random(), expected)
+        self.assertEqual(sys.path, path_before)
+
+    def test_results_are_reproducible_for_a_seed(self):
+        first = sim.simulate(days=3, seed=7)
+        second = sim.simulate(days=3, seed=7)
+
+        first.pop('wall_seconds')
+        second.pop('wall_seconds')
+        self.assertEqual(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,274 @@
+"""Tests for sync_group_images.py against the local Graph API stand-in"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sync_group_images as sync
+from graph_standin import GraphStandIn, make_post
+
+NOW = int(time.time())
+FRESH = NOW + 30 * 86400   # URL expiry well outside the refresh window
+EXPIRING = NOW + 3600      # URL expiry inside the refresh window
+
+
+class SyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.standin = GraphStandIn([make_post(n, NOW - 10000 + n, FRESH) for n in range(35)]).start()
+        self.addCleanup(self.standin.stop)
+
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, True)
+        original_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        self.addCleanup(os.chdir, original_cwd)
+        with open('group_images.json', 'w') as f:
+            json.dump({'source_group': 'g1', 'source_method': 'manual', 'total_images': 0, 'images': []}, f)
+
+        for name, value in [('GRAPH_API_BASE', self.standin.base_url), ('FACEBOOK_ACCESS_TOKEN', 'test'),
+                            ('PAGE_SIZE', 10), ('MAX_WORKERS', 2)]:
+            patch = mock.patch.object(sync, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def sync(self):
+        """Run a sync quietly; returns (result, requests made)"""
+        self.standin.requests.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = sync.sync_group_images()
+        return result, len(self.standin.requests)
+
+    def library(self):
+        with open('group_images.json') as f:
+            return json.load(f)
+
+    def expire_library_urls(self, post_ids):
+        """Make the stored URLs for these posts look like they expire within the hour"""
+        library = self.library()
+        for img in library['images']:
+            if img['post_id'] in post_ids:
+                img['url'] = img['url'].split('?')[0] + f"?oh=old&oe={EXPIRING:x}"
+        with open('group_images.json', 'w') as f:
+            json.dump(library, f)
+
+    def test_first_sync_reads_every_page(self):
+        result, requests_made = self.sync()
+
+        library = self.library()
+        self.assertTrue(result)
+        self.assertEqual(requests_made, 4)  # 35 posts at 10 per page
+        self.assertEqual(library['total_images'], 35)
+        self.assertEqual(library['images'][0]['post_id'], 'group_34')  # newest first
+        self.assertEqual(library['sync_state']['last_synced_at'], NOW - 10000 + 34)
+        self.assertIsNone(library['sync_state']['cursor'])
+
+    def test_second_sync_with_no_changes_is_a_single_request(self):
+        self.sync()
+        before = self.library()['images']
+
+        result, requests_made = self.sync()
+
+        self.assertTrue(result)
+        self.assertEqual(requests_made, 1)
+        self.assertEqual(self.library()['images'], before)
+
+    def test_delta_only_reads_posts_with_newer_updated_time(self):
+        self.sync()
+        for n in (3, 4):
+            self.standin.posts[f"group_{n}"] = make_post(n, NOW, FRESH, reactions=42)
+
+        result, requests_made = self.sync()
+
+        _, feed_query = self.standin.requests[0]
+        self.assertEqual(int(feed_query['since']), NOW - 10000 + 34)
+        self.assertEqual(requests_made, 1)
+        library = self.library()
+        reactions = {img['post_id']: img['reactions'] for img in library['images']}
+        self.assertEqual(reactions['group_3'], 42)
+        self.assertEqual(reactions['group_4'], 42)
+        self.assertEqual(reactions['group_5'], 0)
+        self.assertEqual(library['total_images'], 35)
+        self.assertEqual(library['sync_state']['last_synced_at'], NOW)
+
+    def test_interrupted_sync_resumes_from_saved_cursor(self):
+        self.standin.fail_requests = {3}
+
+        result, _ = self.sync()
+
+        library = self.library()
+        self.assertFalse(result)
+        self.assertEqual(library['total_images'], 20)
+        self.assertEqual(library['sync_state']['cursor'], '20')
+        self.assertEqual(library['sync_state']['pending_synced_at'], NOW - 10000 + 34)
+
+        self.standin.fail_requests = set()
+        result, requests_made = self.sync()
+
+        library = self.library()
+        _, resume_query = self.standin.requests[0]
+        self.assertTrue(result)
+        self.assertEqual(resume_query['after'], '20')
+        self.assertEqual(requests_made, 2)
+        self.assertEqual(library['total_images'], 35)
+        # The watermark covers the newest post from the interrupted run's pages
+        self.assertEqual(library['sync_state']['last_synced_at'], NOW - 10000 + 34)
+        self.assertNotIn('pending_synced_at', library['sync_state'])
+
+        self.sync()
+        self.assertEqual(len(self.standin.requests), 1)
+
+    def test_rejected_cursor_restarts_from_the_watermark(self):
+        self.sync()
+        library = self.library()
+        library['sync_state']['cursor'] = 'stale-cursor'
+        with open('group_images.json', 'w') as f:
+            json.dump(library, f)
+        self.standin.posts['group_3'] = make_post(3, NOW, FRESH, reactions=7)
+
+        result, requests_made = self.sync()
+
+        library = self.library()
+        self.assertTrue(result)
+        self.assertEqual(requests_made, 2)
+        self.assertNotIn('after', self.standin.requests[1][1])
+        self.assertIsNone(library['sync_state']['cursor'])
+        self.assertEqual(library['sync_state']['last_synced_at'], NOW)
+
+    def test_expiring_urls_are_refreshed_even_if_the_feed_fails(self):
+        self.sync()
+        self.expire_library_urls({'group_1', 'group_2'})
+        self.standin.fail_requests = {1}
+
+        result, _ = self.sync()
+
+        library = self.library()
+        self.assertFalse(result)
+        self.assertFalse([img for img in library['images'] if 'oh=old' in img['url']])
+        self.assertEqual(library['sync_state']['last_synced_at'], NOW - 10000 + 34)
+
+    def test_expiring_urls_are_refreshed_through_ids_lookup(self):
+        for n in range(35, 120):
+            self.standin.posts[f"group_{n}"] = make_post(n, NOW - 20000 + n, FRESH)
+        self.sync()
+        expiring = {f"group_{n}" for n in range(10, 120)}
+        self.expire_library_urls(expiring)
+
+        result, requests_made = self.sync()
+
+        lookups = [query['ids'].split(',') for path, query in self.standin.requests if 'ids' in query]
+        self.assertTrue(result)
+        # group_34 is the watermark post, so the feed delta re-reads it instead
+        self.assertEqual(sorted(len(ids) for ids in lookups), [9, 50, 50])
+        self.assertEqual(set().union(*lookups), expiring - {'group_34'})
+        self.assertLessEqual(self.standin.max_in_flight, 2)
+        library = self.library()
+        self.assertEqual(library['total_images'], 120)
+        self.assertFalse([img for img in library['images'] if 'oh=old' in img['url']])
+
+    def test_deleted_post_does_not_block_its_batch(self):
+        self.sync()
+        self.expire_library_urls({f"group_{n}" for n in range(35)})
+        del self.standin.posts['group_7']
+
+        result, _ = self.sync()
+
+        library = self.library()
+        self.assertTrue(result)
+        self.assertEqual(library['total_images'], 34)
+        self.assertNotIn('group_7', {img['post_id'] for img in library['images']})
+        self.assertFalse([img for img in library['images'] if 'oh=old' in img['url']])
+
+    def test_invalid_parameter_error_does_not_delete_images(self):
+        self.sync()
+        self.expire_library_urls({f"group_{n}" for n in range(35)})
+        self.standin.field_error = True
+
+        result, _ = self.sync()
+
+        self.assertFalse(result)
+        self.assertEqual(self.library()['total_images'], 35)
+
+    def test_failed_refresh_is_reported_as_incomplete(self):
+        self.sync()
+        self.expire_library_urls({'group_1'})
+        self.standin.fail_requests = {2}  # the ?ids= lookup after the feed page
+
+        result, _ = self.sync()
+
+        self.assertFalse(result)
+        self.assertEqual(self.library()['total_images'], 35)
+
+
+class ExtractImagesTest(unittest.TestCase):
+
+    def attachment(self, kind, name, subattachments=None):
+        attachment = {'type': kind, 'media': {'image': {'src': f"https://scontent.fbcdn.net/v/{name}.jpg"}},
+                      'target': {'id': name}}
+        if subattachments:
+            attachment['subattachments'] = {'data': subattachments}
+        return attachment
+
+    def test_only_photos_are_kept(self):
+        post = {'id': 'group_1', 'message': 'Mix', 'full_picture': 'https://scontent.fbcdn.net/v/preview.jpg',
+                'attachments': {'data': [
+                    self.attachment('share', 'link_preview'),
+                    self.attachment('video_inline', 'video_poster'),
+                    self.attachment('photo', 'single_photo'),
+                    self.attachment('album', 'album_cover', [
+                        self.attachment('photo', 'album_photo'),
+                        self.attachment('video', 'album_video'),
+                    ]),
+                ]}}
+
+        images = sync.extract_images(post)
+
+        self.assertEqual([img['photo_id'] for img in images], ['single_photo', 'album_photo'])
+
+    def test_posts_without_photos_add_nothing(self):
+        post = {'id': 'group_2', 'full_picture': 'https://scontent.fbcdn.net/v/preview.jpg',
+                'attachments': {'data': [self.attachment('share', 'link_preview')]}}
+
+        self.assertEqual(sync.extract_images(post), [])
+
+
+class MergeImagesTest(unittest.TestCase):
+
+    def test_matches_existing_images_by_file_name(self):
+        library = {'images': [
+            {'url': 'https://scontent.fbcdn.net/v/1_n.jpg?oh=old&oe=1', 'post_message': 'manual', 'reactions': 0, 'comments': 0},
+        ]}
+        fetched = [
+            {'url': 'https://scontent.fbcdn.net/v/1_n.jpg?oh=new&oe=2', 'reactions': 5, 'post_id': 'group_1'},
+            {'url': 'https://scontent.fbcdn.net/v/2_n.jpg?oh=new&oe=2', 'reactions': 1, 'post_id': 'group_2'},
+        ]
+
+        added, updated = sync.merge_images(library, fetched)
+
+        self.assertEqual((added, updated), (1, 1))
+        self.assertEqual([img['url'] for img in library['images']], [
+            'https://scontent.fbcdn.net/v/2_n.jpg?oh=new&oe=2',
+            'https://scontent.fbcdn.net/v/1_n.jpg?oh=new&oe=2',
+        ])
+        self.assertEqual(library['images'][1]['reactions'], 5)
+        self.assertEqual(library['images'][1]['post_id'], 'group_1')
+
+    def test_unchanged_images_are_not_counted_as_updated(self):
+        image = {'url': 'https://scontent.fbcdn.net/v/1_n.jpg?oe=1', 'reactions': 2}
+        library = {'images': [dict(image)]}
+
+        self.assertEqual(sync.merge_images(library, [dict(image)]), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()